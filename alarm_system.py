@@ -1,9 +1,15 @@
 import logging
-from typing import Dict, Any, List
+import operator
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
 class AlarmLevel(Enum):
     """Alarm severity levels"""
     INFO = "info"
@@ -15,19 +21,56 @@ class Alarm:
     """Alarm data structure"""
     level: AlarmLevel
     message: str
-    timestamp: str
+    timestamp: float  # epoch seconds, formatted as ISO 8601 on output
     sensor: str
     value: float
     threshold: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert alarm to a JSON-friendly dictionary"""
+        return {
+            'level': self.level.value,
+            'message': self.message,
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat(),
+            'sensor': self.sensor,
+            'value': self.value,
+            'threshold': self.threshold
+        }
 
 class AlarmSystem:
     """Alarm monitoring and notification system"""
     
+    # (sensor, config key, default threshold, comparator, level, message template)
+    THRESHOLDS = [
+        ('temperature', 'temp_alarm_high', 35.0, operator.gt, AlarmLevel.WARNING,
+         "Yüksek sıcaklık: {value}°C (eşik: {threshold}°C)"),
+        ('temperature', 'temp_alarm_low', 5.0, operator.lt, AlarmLevel.WARNING,
+         "Düşük sıcaklık: {value}°C (eşik: {threshold}°C)"),
+        ('humidity', 'humidity_alarm_high', 85.0, operator.gt, AlarmLevel.WARNING,
+         "Yüksek nem: {value}% (eşik: {threshold}%)"),
+        ('co2', 'co2_alarm_high', 2000.0, operator.gt, AlarmLevel.CRITICAL,
+         "Yüksek CO2 seviyesi: {value} ppm (eşik: {threshold} ppm)"),
+        ('battery_soc', 'battery_soc_alarm_low', 20, operator.lt, AlarmLevel.CRITICAL,
+         "Düşük batarya: %{value} (eşik: %{threshold})"),
+        # PM2.5 uses a fixed unhealthy threshold (no config key)
+        ('pm2_5', None, 55.0, operator.gt, AlarmLevel.WARNING,
+         "Yüksek partikül seviyesi (PM2.5): {value} µg/m³"),
+    ]
+    
+    # Log prefix and logging level per alarm level
+    LEVEL_TAGS = {level: f"[ALARM {level.value.upper()}] " for level in AlarmLevel}
+    LOG_LEVELS = {
+        AlarmLevel.INFO: logging.INFO,
+        AlarmLevel.WARNING: logging.WARNING,
+        AlarmLevel.CRITICAL: logging.CRITICAL,
+    }
+    
     def __init__(self, config):
         self.config = config
-        self.active_alarms: List[Alarm] = []
-        self.alarm_history: List[Alarm] = []
+        self.active_alarms: Dict[Tuple[str, AlarmLevel], Alarm] = {}
         self.max_history = 100
+        self.alarm_history: Deque[Alarm] = deque(maxlen=self.max_history)
+        self._active_cache: Optional[List[Dict[str, Any]]] = None
         
     def check_alarms(self, data: Dict[str, Any]) -> List[Alarm]:
         """Check sensor data against alarm thresholds"""
@@ -36,93 +79,23 @@ class AlarmSystem:
         if not self.config.get('alarm_enabled', True):
             return new_alarms
         
-        # Temperature alarms
-        temp = data.get('temperature')
-        if temp is not None:
-            temp_high = self.config.get('temp_alarm_high', 35.0)
-            temp_low = self.config.get('temp_alarm_low', 5.0)
-            
-            if temp > temp_high:
-                alarm = Alarm(
-                    level=AlarmLevel.WARNING,
-                    message=f"Yüksek sıcaklık: {temp}°C (eşik: {temp_high}°C)",
-                    timestamp=datetime.now().isoformat(),
-                    sensor="temperature",
-                    value=temp,
-                    threshold=temp_high
-                )
-                new_alarms.append(alarm)
-                
-            elif temp < temp_low:
-                alarm = Alarm(
-                    level=AlarmLevel.WARNING,
-                    message=f"Düşük sıcaklık: {temp}°C (eşik: {temp_low}°C)",
-                    timestamp=datetime.now().isoformat(),
-                    sensor="temperature",
-                    value=temp,
-                    threshold=temp_low
-                )
-                new_alarms.append(alarm)
-        
-        # Humidity alarm
-        humidity = data.get('humidity')
-        if humidity is not None:
-            hum_high = self.config.get('humidity_alarm_high', 85.0)
-            if humidity > hum_high:
-                alarm = Alarm(
-                    level=AlarmLevel.WARNING,
-                    message=f"Yüksek nem: {humidity}% (eşik: {hum_high}%)",
-                    timestamp=datetime.now().isoformat(),
-                    sensor="humidity",
-                    value=humidity,
-                    threshold=hum_high
-                )
-                new_alarms.append(alarm)
-        
-        # CO2 alarm
-        co2 = data.get('co2')
-        if co2 is not None:
-            co2_high = self.config.get('co2_alarm_high', 2000.0)
-            if co2 > co2_high:
-                alarm = Alarm(
-                    level=AlarmLevel.CRITICAL,
-                    message=f"Yüksek CO2 seviyesi: {co2} ppm (eşik: {co2_high} ppm)",
-                    timestamp=datetime.now().isoformat(),
-                    sensor="co2",
-                    value=co2,
-                    threshold=co2_high
-                )
-                new_alarms.append(alarm)
+        timestamp = time.time()
         
-        # Battery SOC alarm
-        soc = data.get('battery_soc')
-        if soc is not None:
-            soc_low = self.config.get('battery_soc_alarm_low', 20)
-            if soc < soc_low:
-                alarm = Alarm(
-                    level=AlarmLevel.CRITICAL,
-                    message=f"Düşük batarya: %{soc} (eşik: %{soc_low})",
-                    timestamp=datetime.now().isoformat(),
-                    sensor="battery_soc",
-                    value=soc,
-                    threshold=soc_low
-                )
-                new_alarms.append(alarm)
-        
-        # PM2.5 alarm (air quality)
-        pm25 = data.get('pm2_5')
-        if pm25 is not None:
-            pm25_high = 55.0  # Unhealthy threshold
-            if pm25 > pm25_high:
-                alarm = Alarm(
-                    level=AlarmLevel.WARNING,
-                    message=f"Yüksek partikül seviyesi (PM2.5): {pm25} µg/m³",
-                    timestamp=datetime.now().isoformat(),
-                    sensor="pm2_5",
-                    value=pm25,
-                    threshold=pm25_high
-                )
-                new_alarms.append(alarm)
+        for sensor, key, default, exceeds, level, template in self.THRESHOLDS:
+            value = data.get(sensor)
+            if value is None:
+                continue
+            
+            threshold = self.config.get(key, default) if key else default
+            if exceeds(value, threshold):
+                new_alarms.append(Alarm(
+                    level=level,
+                    message=template.format(value=value, threshold=threshold),
+                    timestamp=timestamp,
+                    sensor=sensor,
+                    value=value,
+                    threshold=threshold
+                ))
         
         # Process new alarms
         for alarm in new_alarms:
@@ -133,61 +106,42 @@ class AlarmSystem:
     
     def _add_alarm(self, alarm: Alarm):
         """Add alarm to active list"""
-        # Check if similar alarm already exists
-        existing = next((a for a in self.active_alarms 
-                        if a.sensor == alarm.sensor and a.level == alarm.level), None)
-        
-        if not existing:
-            self.active_alarms.append(alarm)
+        # Keep only the first alarm per (sensor, level) pair
+        key = (alarm.sensor, alarm.level)
+        if key not in self.active_alarms:
+            self.active_alarms[key] = alarm
+            self._active_cache = None
             
-        # Add to history
+        # Add to history (deque drops the oldest entry once full)
         self.alarm_history.append(alarm)
-        if len(self.alarm_history) > self.max_history:
-            self.alarm_history.pop(0)
     
     def _log_alarm(self, alarm: Alarm):
         """Log alarm to system logger"""
-        log_msg = f"[ALARM {alarm.level.value.upper()}] {alarm.message}"
-        
-        if alarm.level == AlarmLevel.CRITICAL:
-            logging.critical(log_msg)
-        elif alarm.level == AlarmLevel.WARNING:
-            logging.warning(log_msg)
-        else:
-            logging.info(log_msg)
+        logger.log(self.LOG_LEVELS[alarm.level], "%s%s",
+                   self.LEVEL_TAGS[alarm.level], alarm.message)
     
     def clear_alarms(self, sensor: str = None):
         """Clear active alarms for a sensor or all"""
         if sensor:
-            self.active_alarms = [a for a in self.active_alarms if a.sensor != sensor]
+            self.active_alarms = {k: a for k, a in self.active_alarms.items()
+                                  if a.sensor != sensor}
         else:
             self.active_alarms.clear()
+        self._active_cache = None
     
     def get_active_alarms(self) -> List[Dict[str, Any]]:
-        """Get list of active alarms"""
-        return [
-            {
-                'level': a.level.value,
-                'message': a.message,
-                'timestamp': a.timestamp,
-                'sensor': a.sensor,
-                'value': a.value,
-                'threshold': a.threshold
-            }
-            for a in self.active_alarms
-        ]
+        """Get list of active alarms (cached until the active set changes)"""
+        if self._active_cache is not None:
+            return self._active_cache
+        
+        self._active_cache = [a.to_dict() for a in self.active_alarms.values()]
+        return self._active_cache
     
     def get_alarm_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get alarm history"""
-        history = self.alarm_history[-limit:] if limit else self.alarm_history
-        return [
-            {
-                'level': a.level.value,
-                'message': a.message,
-                'timestamp': a.timestamp,
-                'sensor': a.sensor,
-                'value': a.value,
-                'threshold': a.threshold
-            }
-            for a in history
-        ]
\ No newline at end of file
+        if limit:
+            start = max(0, len(self.alarm_history) - limit)
+            history = islice(self.alarm_history, start, None)
+        else:
+            history = self.alarm_history
+        return [a.to_dict() for a in history]
\ No newline at end of file
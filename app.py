@@ -1,12 +1,22 @@
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for
+import os
+
+# The production server runs on gevent; patch blocking stdlib calls (sockets,
+# DNS, threads, sleep) before anything imports them. DEV uses threaded Werkzeug.
+if not os.environ.get('DEV'):
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, Blueprint, render_template, jsonify, request, session, redirect, url_for
 from flask_socketio import SocketIO, emit
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from flask_orjson import OrjsonProvider
 from functools import wraps
-import json
-import os
 import socket
 import uuid
+import threading
+import time
+import orjson
 import serial.tools.list_ports
 import logging
 from datetime import datetime
@@ -24,10 +34,22 @@ logger = logging.getLogger(__name__)
 
 # Flask app initialization
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = os.urandom(24)
 
+class OrjsonPackets:
+    """orjson adapter with the json module interface Socket.IO expects"""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
 # SocketIO for real-time updates
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", json=OrjsonPackets)
 
 # Rate limiting
 limiter = Limiter(
@@ -39,6 +61,74 @@ limiter = Limiter(
 # Initialize alarm system
 alarm_system = AlarmSystem(config_manager)
 
+SENSOR_FILE = 'sensors.json'
+
+# Parsed sensors.json, reloaded only when the reader rewrites the file
+_sensors_cache = {'mtime': 0, 'data': None}
+_sensors_lock = threading.Lock()
+
+def _load_sensors() -> dict:
+    """Return a copy of the latest sensor data, re-parsing only on change"""
+    with _sensors_lock:
+        st = os.stat(SENSOR_FILE)
+        if st.st_mtime != _sensors_cache['mtime']:
+            with open(SENSOR_FILE, 'rb') as f:
+                _sensors_cache['data'] = orjson.loads(f.read())
+            _sensors_cache['mtime'] = st.st_mtime
+        return dict(_sensors_cache['data'])
+
+# Network identity rarely changes; refresh it at most once per NET_CACHE_TTL
+NET_CACHE_TTL = 60
+_net_cache = {'info': None, 'ts': 0.0}
+
+def _resolve_ip(hostname: str) -> str:
+    """Resolve the gateway IP, falling back to the outbound interface address"""
+    ip = None
+    try:
+        ip = socket.gethostbyname(hostname)
+        if not ip.startswith('127.'):
+            return ip
+    except OSError as e:
+        logger.warning("Hostname lookup failed: %s", e)
+    
+    # Connecting a UDP socket sends no packets; it only selects a route
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError as e:
+        # No default route (offline gateway): keep the loopback address
+        logger.warning("No outbound route: %s", e)
+        return ip or '0.0.0.0'
+
+def _get_network_info() -> dict:
+    """Return hostname, IP and MAC address, cached for NET_CACHE_TTL seconds"""
+    now = time.monotonic()
+    if _net_cache['info'] is None or now - _net_cache['ts'] >= NET_CACHE_TTL:
+        hostname = socket.gethostname()
+        ip = _resolve_ip(hostname)
+        node = '%012x' % uuid.getnode()
+        mac = ':'.join(node[i:i + 2] for i in range(0, 12, 2))
+        _net_cache['info'] = {
+            "hostname": hostname,
+            "ip": ip,
+            "mac": mac
+        }
+        _net_cache['ts'] = now
+    return _net_cache['info']
+
+# Serial port scans walk sysfs; reuse the result for a few seconds
+PORTS_CACHE_TTL = 5
+_ports_cache = {'ports': None, 'ts': 0.0}
+
+def _list_serial_ports() -> list:
+    """Return available serial port devices, cached for PORTS_CACHE_TTL seconds"""
+    now = time.monotonic()
+    if _ports_cache['ports'] is None or now - _ports_cache['ts'] >= PORTS_CACHE_TTL:
+        _ports_cache['ports'] = [port.device for port in serial.tools.list_ports.comports()]
+        _ports_cache['ts'] = now
+    return _ports_cache['ports']
+
 # Authentication decorator
 def requires_auth(f):
     @wraps(f)
@@ -61,51 +151,65 @@ def requires_auth(f):
 
 # === Routes ===
 
-@app.route("/")
+pages_bp = Blueprint('pages', __name__)
+api_bp = Blueprint('api', __name__, url_prefix='/api')
+
+# Page templates are static HTML, so each one is rendered only once
+_page_cache = {}
+
+def _render_page(template: str) -> str:
+    """Render a page template, reusing the cached HTML outside debug mode"""
+    if app.debug:
+        return render_template(template)
+    html = _page_cache.get(template)
+    if html is None:
+        html = _page_cache[template] = render_template(template)
+    return html
+
+@pages_bp.route("/")
 def index():
-    return render_template("dashboard.html")
+    return _render_page("dashboard.html")
 
-@app.route("/dashboard")
+@pages_bp.route("/dashboard")
 def dashboard():
-    return render_template("dashboard.html")
+    return _render_page("dashboard.html")
 
-@app.route("/devices")
+@pages_bp.route("/devices")
 def devices():
-    return render_template("devices.html")
+    return _render_page("devices.html")
 
-@app.route("/settings")
+@pages_bp.route("/settings")
 def settings():
-    return render_template("settings.html")
+    return _render_page("settings.html")
 
-@app.route("/alarms")
+@pages_bp.route("/alarms")
 def alarms_page():
-    return render_template("alarms.html")
+    return _render_page("alarms.html")
 
 # === API Endpoints ===
 
-@app.route('/api/sensors')
+@api_bp.route('/sensors')
 @limiter.limit("60 per minute")
 @requires_auth
 def api_sensors():
     """Get current sensor data"""
     try:
-        with open('sensors.json') as f:
-            data = json.load(f)
-            data['timestamp'] = datetime.now().isoformat()
-            return jsonify(data)
+        data = _load_sensors()
+        data['timestamp'] = datetime.now().isoformat()
+        return jsonify(data)
     except FileNotFoundError:
         return jsonify({"error": "No sensor data available"}), 404
     except Exception as e:
-        logger.error(f"Error reading sensors: {e}")
+        logger.error("Error reading sensors: %s", e)
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/relays')
+@api_bp.route('/relays')
 @requires_auth
 def api_relays():
     """Get current relay states"""
     return jsonify(get_relay_states())
 
-@app.route('/api/relay/<name>', methods=['POST'])
+@api_bp.route('/relay/<name>', methods=['POST'])
 @requires_auth
 def api_relay_control(name):
     """Control individual relay"""
@@ -124,23 +228,23 @@ def api_relay_control(name):
             return jsonify({"error": "Failed to control relay"}), 500
             
     except Exception as e:
-        logger.error(f"Relay control error: {e}")
+        logger.error("Relay control error: %s", e)
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/alarms/active')
+@api_bp.route('/alarms/active')
 @requires_auth
 def api_active_alarms():
     """Get active alarms"""
     return jsonify(alarm_system.get_active_alarms())
 
-@app.route('/api/alarms/history')
+@api_bp.route('/alarms/history')
 @requires_auth
 def api_alarm_history():
     """Get alarm history"""
     limit = request.args.get('limit', 50, type=int)
     return jsonify(alarm_system.get_alarm_history(limit))
 
-@app.route('/api/alarms/clear', methods=['POST'])
+@api_bp.route('/alarms/clear', methods=['POST'])
 @requires_auth
 def api_clear_alarms():
     """Clear alarms"""
@@ -149,60 +253,50 @@ def api_clear_alarms():
     alarm_system.clear_alarms(sensor)
     return jsonify({"status": "ok"})
 
-@app.route("/api/settings", methods=['GET'])
+@api_bp.route("/settings", methods=['GET'])
 @requires_auth
 def api_get_settings():
     """Get current settings"""
     return jsonify(config_manager.to_dict())
 
-@app.route("/api/settings", methods=['POST'])
+@api_bp.route("/settings", methods=['POST'])
 @requires_auth
 def api_save_settings():
     """Save settings"""
     try:
         data = request.get_json()
         
-        # Update config
-        for key, value in data.items():
-            config_manager.set(key, value)
+        # Update config; the file is written once, in the background
+        config_manager.set_many(data)
         
         return jsonify({"status": "ok"})
     except Exception as e:
-        logger.error(f"Settings save error: {e}")
+        logger.error("Settings save error: %s", e)
         return jsonify({"error": str(e)}), 500
 
-@app.route("/api/network-info")
+@api_bp.route("/network-info")
 def api_network_info():
     """Get network information"""
     try:
-        hostname = socket.gethostname()
-        ip = socket.gethostbyname(hostname)
-        mac = ':'.join(['{:02x}'.format((uuid.getnode() >> ele) & 0xff)
-                        for ele in range(0, 2*6, 8)][::-1])
-        return jsonify({
-            "hostname": hostname,
-            "ip": ip,
-            "mac": mac
-        })
+        return jsonify(_get_network_info())
     except Exception as e:
-        logger.error(f"Network info error: {e}")
+        logger.error("Network info error: %s", e)
         return jsonify({
             "hostname": "unknown",
             "ip": "0.0.0.0",
             "mac": "00:00:00:00:00:00"
         })
 
-@app.route("/api/serial-ports")
+@api_bp.route("/serial-ports")
 def api_serial_ports():
     """List available serial ports"""
     try:
-        ports = [port.device for port in serial.tools.list_ports.comports()]
-        return jsonify({"ports": ports})
+        return jsonify({"ports": _list_serial_ports()})
     except Exception as e:
-        logger.error(f"Serial ports error: {e}")
+        logger.error("Serial ports error: %s", e)
         return jsonify({"ports": []})
 
-@app.route("/api/stats")
+@api_bp.route("/stats")
 @requires_auth
 def api_stats():
     """Get system statistics"""
@@ -217,12 +311,12 @@ def api_stats():
         }
         return jsonify(stats)
     except Exception as e:
-        logger.error(f"Stats error: {e}")
+        logger.error("Stats error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 # === Authentication ===
 
-@app.route("/api/login", methods=['POST'])
+@api_bp.route("/login", methods=['POST'])
 @limiter.limit("5 per minute")
 def api_login():
     """Login endpoint"""
@@ -238,50 +332,67 @@ def api_login():
     else:
         return jsonify({"error": "Invalid token"}), 401
 
-@app.route("/api/logout", methods=['POST'])
+@api_bp.route("/logout", methods=['POST'])
 def api_logout():
     """Logout endpoint"""
     session.pop('authenticated', None)
     return jsonify({"status": "ok", "message": "Logged out"})
 
+app.register_blueprint(pages_bp)
+app.register_blueprint(api_bp)
+
 # === WebSocket Events ===
 
+# Number of connected Socket.IO clients; broadcasts are skipped while zero
+_client_count = 0
+_client_lock = threading.Lock()
+_broadcast_started = False
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
-    logger.info(f"Client connected: {request.sid}")
+    global _client_count, _broadcast_started
+    with _client_lock:
+        _client_count += 1
+        # Started here rather than in __main__ so it also runs under gunicorn
+        if not _broadcast_started:
+            socketio.start_background_task(background_sensor_broadcast)
+            _broadcast_started = True
+    logger.info("Client connected: %s", request.sid)
     emit('connected', {'message': 'Connected to nuGateway'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
-    logger.info(f"Client disconnected: {request.sid}")
+    global _client_count
+    with _client_lock:
+        _client_count = max(0, _client_count - 1)
+    logger.info("Client disconnected: %s", request.sid)
 
 @socketio.on('request_update')
 def handle_update_request():
     """Handle real-time data request"""
     try:
-        with open('sensors.json') as f:
-            data = json.load(f)
-            data['timestamp'] = datetime.now().isoformat()
-            emit('sensor_update', data)
+        data = _load_sensors()
+        data['timestamp'] = datetime.now().isoformat()
+        emit('sensor_update', data)
     except Exception as e:
-        logger.error(f"Update request error: {e}")
+        logger.error("Update request error: %s", e)
 
 # Background task to broadcast sensor updates
 def background_sensor_broadcast():
     """Broadcast sensor data to all connected clients"""
-    import time
     while True:
         try:
             socketio.sleep(5)  # Update every 5 seconds
-            with open('sensors.json') as f:
-                data = json.load(f)
-                data['timestamp'] = datetime.now().isoformat()
-                socketio.emit('sensor_update', data, broadcast=True)
+            if _client_count == 0:
+                continue
+            data = _load_sensors()
+            data['timestamp'] = datetime.now().isoformat()
+            # Server-level emit already goes to every connected client
+            socketio.emit('sensor_update', data)
         except Exception as e:
-            logger.error(f"Broadcast error: {e}")
-            socketio.sleep(5)
+            logger.error("Broadcast error: %s", e)
 
 # === Error Handlers ===
 
@@ -291,7 +402,7 @@ def not_found(error):
 
 @app.errorhandler(500)
 def internal_error(error):
-    logger.error(f"Internal error: {error}")
+    logger.error("Internal error: %s", error)
     return jsonify({"error": "Internal server error"}), 500
 
 @app.errorhandler(429)
@@ -302,16 +413,21 @@ def ratelimit_handler(e):
 
 if __name__ == "__main__":
     logger.info("🚀 nuGateway Flask app starting...")
-    logger.info(f"Authentication: {'Enabled' if config_manager.get('enable_auth', False) else 'Disabled'}")
+    logger.info("Authentication: %s", 'Enabled' if config_manager.get('enable_auth', False) else 'Disabled')
     
-    # Start background broadcast thread
-    socketio.start_background_task(background_sensor_broadcast)
-    
-    # Run app
-    socketio.run(
-        app,
-        debug=True,
-        host="0.0.0.0",
-        port=5000,
-        allow_unsafe_werkzeug=True
-    )
\ No newline at end of file
+    if os.environ.get('DEV'):
+        # Werkzeug development server with debugger and reloader
+        socketio.run(
+            app,
+            debug=True,
+            host="0.0.0.0",
+            port=5000,
+            allow_unsafe_werkzeug=True
+        )
+    else:
+        # Served by gevent's WSGI server (async_mode is detected from gevent)
+        socketio.run(
+            app,
+            host="0.0.0.0",
+            port=5000
+        )
\ No newline at end of file
@@ -1,6 +1,7 @@
-import json
+import orjson
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 from dataclasses import dataclass, asdict
 
 @dataclass
@@ -28,6 +29,8 @@ class GatewayConfig:
     mqtt_topic: str = "nugateway/sensors"
     mqtt_username: str = ""
     mqtt_password: str = ""
+    mqtt_sensor_qos: int = 0  # telemetry QoS; alarms always use QoS 2
+    mqtt_batch_interval: float = 0.0  # seconds; >0 batches readings to <topic>/batch
     
     # Logging settings
     log_level: str = "INFO"
@@ -47,29 +50,57 @@ class ConfigManager:
     """Configuration manager with file persistence"""
     
     SETTINGS_FILE = "gateway_settings.json"
+    SAVE_DELAY = 0.5  # seconds; saves scheduled within this window are coalesced
     
     def __init__(self):
+        self._mtime = self._settings_mtime()
         self.config = self.load()
+        self._lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dict_cache: Optional[Dict[str, Any]] = None
     
     def load(self) -> GatewayConfig:
         """Load configuration from file"""
-        if os.path.exists(self.SETTINGS_FILE):
-            try:
-                with open(self.SETTINGS_FILE, 'r') as f:
-                    data = json.load(f)
-                    return GatewayConfig(**data)
-            except Exception as e:
-                print(f"⚠️ Config load error: {e}, using defaults")
-                return GatewayConfig()
-        return GatewayConfig()
+        try:
+            with open(self.SETTINGS_FILE, 'rb') as f:
+                data = orjson.loads(f.read())
+                return GatewayConfig(**data)
+        except FileNotFoundError:
+            return GatewayConfig()
+        except Exception as e:
+            print(f"⚠️ Config load error: {e}, using defaults")
+            return GatewayConfig()
+    
+    def _settings_mtime(self) -> float:
+        """Modification time of the settings file, 0 if it does not exist"""
+        try:
+            return os.stat(self.SETTINGS_FILE).st_mtime
+        except FileNotFoundError:
+            return 0.0
+    
+    def reload_if_changed(self) -> bool:
+        """Reload configuration if the settings file changed on disk"""
+        mtime = self._settings_mtime()
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        self.config = self.load()
+        self._dict_cache = None
+        return True
     
     def save(self, config: GatewayConfig = None) -> bool:
-        """Save configuration to file"""
+        """Save configuration to file (atomically, via a temp file)"""
         try:
             if config:
                 self.config = config
-            with open(self.SETTINGS_FILE, 'w') as f:
-                json.dump(asdict(self.config), f, indent=2)
+                self._dict_cache = None
+            tmp_file = self.SETTINGS_FILE + '.tmp'
+            with self._lock:
+                with open(tmp_file, 'wb') as f:
+                    f.write(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
+                os.replace(tmp_file, self.SETTINGS_FILE)
+                # Our own write is already in memory; don't reparse it
+                self._mtime = self._settings_mtime()
             return True
         except Exception as e:
             print(f"❌ Config save error: {e}")
@@ -83,12 +114,38 @@ class ConfigManager:
         """Set configuration value"""
         if hasattr(self.config, key):
             setattr(self.config, key, value)
+            self._dict_cache = None
             return self.save()
         return False
     
+    def set_many(self, updates: Dict[str, Any]) -> bool:
+        """Set several configuration values and schedule a single save
+        
+        Unknown keys are ignored; returns False if any were present.
+        """
+        known = True
+        for key, value in updates.items():
+            if hasattr(self.config, key):
+                setattr(self.config, key, value)
+            else:
+                known = False
+        self._dict_cache = None
+        self.schedule_save()
+        return known
+    
+    def schedule_save(self):
+        """Save configuration in the background after SAVE_DELAY seconds"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self.save)
+            self._save_timer.start()
+    
     def to_dict(self) -> Dict[str, Any]:
-        """Convert config to dictionary"""
-        return asdict(self.config)
+        """Convert config to dictionary (cached until the config changes)"""
+        if self._dict_cache is None:
+            self._dict_cache = asdict(self.config)
+        return self._dict_cache
 
 # Global config instance
 config_manager = ConfigManager()
\ No newline at end of file
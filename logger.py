@@ -1,8 +1,10 @@
 import logging
-import json
+import orjson
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
 
 class SensorDataLogger:
     """Logger for sensor data with rotation support"""
@@ -10,13 +12,18 @@ class SensorDataLogger:
     def __init__(self, log_file: str = "sensor_data.log", max_size_mb: int = 10):
         self.log_file = Path(log_file)
         self.max_size = max_size_mb * 1024 * 1024
+        self._fh: Optional[BinaryIO] = None  # opened lazily on first log
         
     def log(self, data: Dict[str, Any]):
         """Log sensor data with timestamp"""
         try:
+            if self._fh is None:
+                self._fh = open(self.log_file, 'ab')
+            
             # Check file size and rotate if needed
-            if self.log_file.exists() and self.log_file.stat().st_size > self.max_size:
+            if self._fh.tell() > self.max_size:
                 self._rotate()
+                self._fh = open(self.log_file, 'ab')
             
             # Append data with timestamp
             log_entry = {
@@ -24,21 +31,28 @@ class SensorDataLogger:
                 "data": data
             }
             
-            with open(self.log_file, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
+            self._fh.write(orjson.dumps(log_entry, option=orjson.OPT_APPEND_NEWLINE))
+            self._fh.flush()
                 
         except Exception as e:
-            logging.error(f"Data logging failed: {e}")
+            logger.error("Data logging failed: %s", e)
+    
+    def close(self):
+        """Close the log file handle"""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
     
     def _rotate(self):
         """Rotate log file"""
+        self.close()
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             rotated_name = self.log_file.with_name(f"{self.log_file.stem}_{timestamp}.log")
             self.log_file.rename(rotated_name)
-            logging.info(f"Log rotated to {rotated_name}")
+            logger.info("Log rotated to %s", rotated_name)
         except Exception as e:
-            logging.error(f"Log rotation failed: {e}")
+            logger.error("Log rotation failed: %s", e)
 
 def setup_logging(log_level: str = "INFO", log_file: str = "nugateway.log"):
     """Setup application logging"""
@@ -58,12 +72,12 @@ def setup_logging(log_level: str = "INFO", log_file: str = "nugateway.log"):
     file_handler.setFormatter(formatter)
     
     # Configure root logger
-    logger = logging.getLogger()
-    logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    root_logger = logging.getLogger()
+    root_logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
+    root_logger.addHandler(console_handler)
+    root_logger.addHandler(file_handler)
     
-    return logger
+    return root_logger
 
 # Create global sensor data logger
 sensor_logger = SensorDataLogger()
\ No newline at end of file
@@ -1,96 +1,109 @@
 from pymodbus.client import ModbusSerialClient
+from pymodbus.exceptions import ConnectionException
 import struct
-import json
+import orjson
+import os
 import time
 import logging
+from collections import OrderedDict
+from itertools import islice
+import queue
+import threading
 from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
 from relay_control import apply_logic
 from config import config_manager
 from logger import sensor_logger, setup_logging
 from alarm_system import AlarmSystem
 from mqtt_client import MQTTClient
 
-# Setup logging
-setup_logging(
-    log_level=config_manager.get('log_level', 'INFO'),
-    log_file=config_manager.get('log_file', 'nugateway.log')
-)
 logger = logging.getLogger(__name__)
 
 SENSOR_FILE = "sensors.json"
 
 class SensorCache:
-    """Simple cache for sensor data with TTL"""
+    """Bounded LRU cache for sensor data with TTL"""
     
-    def __init__(self, ttl_seconds: int = 5):
-        self.cache: Dict[str, Any] = {}
-        self.timestamps: Dict[str, datetime] = {}
-        self.ttl = timedelta(seconds=ttl_seconds)
+    def __init__(self, ttl_seconds: int = 5, max_entries: int = 128):
+        # key -> (value, time.monotonic() expiry deadline), least recent first
+        self.cache: OrderedDict = OrderedDict()
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
     
     def get(self, key: str) -> Optional[Any]:
         """Get cached value if not expired"""
-        if key in self.cache:
-            if datetime.now() - self.timestamps[key] < self.ttl:
-                return self.cache[key]
-            else:
-                del self.cache[key]
-                del self.timestamps[key]
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() < entry[1]:
+            self.cache.move_to_end(key)
+            return entry[0]
+        del self.cache[key]
         return None
     
     def set(self, key: str, value: Any):
-        """Set cache value with current timestamp"""
-        self.cache[key] = value
-        self.timestamps[key] = datetime.now()
+        """Set cache value, expiring ttl seconds from now"""
+        self.cache[key] = (value, time.monotonic() + self.ttl)
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
 
 # Global cache instance
 sensor_cache = SensorCache()
 
-def read_float32_ieee754(registers) -> float:
-    """Convert two 16-bit registers to IEEE 754 float"""
-    try:
-        combined = (registers[0] << 16) | registers[1]
-        return struct.unpack('>f', combined.to_bytes(4, byteorder='big'))[0]
-    except Exception as e:
-        logger.error(f"Float conversion error: {e}")
-        return 0.0
+# Scratch buffer for the env block: 12 registers in, 6 float32 values out.
+# Only the polling thread decodes, so one shared buffer is enough.
+_ENV_BUF = bytearray(24)
+_PACK_ENV = struct.Struct('>12H').pack_into
+_UNPACK_ENV = struct.Struct('>6f').unpack_from
+
+def decode_env_block(registers) -> tuple:
+    """Convert the 12 env registers to six IEEE 754 floats without allocating bytes"""
+    _PACK_ENV(_ENV_BUF, 0, *registers)
+    return _UNPACK_ENV(_ENV_BUF, 0)
+
+# Air quality label and score, indexed by the combined PM2.5 + CO2 score (0-4)
+AIR_QUALITY_LEVELS = (
+    ("Mükemmel", 0),
+    ("Orta", 25),
+    ("Düşük kalite", 50),
+    ("Kötü", 75),
+    ("Sağlıksız", 100)
+)
 
 def classify_air_quality(pm2_5: float, co2: float) -> tuple:
     """Classify air quality based on PM2.5 and CO2 levels"""
-    score = 0
-    
-    if pm2_5 > 55:
-        score += 2
-    elif pm2_5 > 35:
-        score += 1
-    
-    if co2 > 2000:
-        score += 2
-    elif co2 > 1200:
-        score += 1
-    
-    levels = {
-        0: ("Mükemmel", 0),
-        1: ("Orta", 25),
-        2: ("Düşük kalite", 50),
-        3: ("Kötü", 75),
-        4: ("Sağlıksız", 100)
-    }
-    
-    return levels.get(score, ("Bilinmiyor", 0))
+    # Each exceeded threshold adds one step, so no branching is needed
+    return AIR_QUALITY_LEVELS[(pm2_5 > 35) + (pm2_5 > 55) +
+                              (co2 > 1200) + (co2 > 2000)]
+
+# Bin edges as (bound, inclusive): a value falls in the first bin whose bound
+# it is below (or equal to, when inclusive); past the last edge is the top bin
+TEMP_BINS = ((10, False), (15, False), (20, True), (25, True))  # 0..4
+HUMIDITY_BINS = ((50, False), (70, True))                        # 0..2
+LUX_BINS = ((10000, False), (15000, False), (20000, True))       # 0..3
+
+def _bucket(value: float, edges) -> int:
+    """Return the index of the bin that value falls into (-1 for NaN)"""
+    if value != value:
+        return -1
+    for i, (bound, inclusive) in enumerate(edges):
+        if value < bound or (inclusive and value == bound):
+            return i
+    return len(edges)
+
+# (temperature bin, humidity bin, lux bin) -> weather description
+WEATHER_TABLE = {
+    (4, 0, 3): "Güneşli ve sıcak",
+    (0, 2, 0): "Soğuk ve yağışlı",
+    **{(t, 1, l): "Serin ve parçalı bulutlu" for t in (1, 2) for l in (1, 2)},
+    **{(t, 2, l): "Ilık ve nemli" for t in (2, 3) for l in (0, 1)},
+}
 
 def estimate_weather(temp: float, humidity: float, lux: int) -> str:
     """Estimate weather condition based on sensor data"""
-    if temp > 25 and humidity < 50 and lux > 20000:
-        return "Güneşli ve sıcak"
-    elif temp < 10 and humidity > 70 and lux < 10000:
-        return "Soğuk ve yağışlı"
-    elif 10 <= temp <= 20 and 50 <= humidity <= 70 and 10000 <= lux <= 20000:
-        return "Serin ve parçalı bulutlu"
-    elif 15 <= temp <= 25 and humidity > 70 and lux < 15000:
-        return "Ilık ve nemli"
-    else:
-        return "Kararsız hava koşulları"
+    key = (_bucket(temp, TEMP_BINS), _bucket(humidity, HUMIDITY_BINS),
+           _bucket(lux, LUX_BINS))
+    return WEATHER_TABLE.get(key, "Kararsız hava koşulları")
 
 def read_sensor_safe(client, address: int, count: int, slave: int, 
                      register_type: str = 'holding') -> Optional[Any]:
@@ -115,154 +128,172 @@ def read_sensor_safe(client, address: int, count: int, slave: int,
             logger.warning(f"Modbus error at slave={slave}, addr={address}: {result}")
             return None
             
+    except ConnectionException as e:
+        # The port itself failed: drop it so the next request reopens it.
+        # A slave that merely times out leaves the shared bus open.
+        logger.error(f"Connection lost reading slave={slave}, addr={address}: {e}")
+        client.close()
+        return None
     except Exception as e:
         logger.error(f"Exception reading slave={slave}, addr={address}: {e}")
         return None
 
-def read_sensors(alarm_system: Optional[AlarmSystem] = None,
-                mqtt_client: Optional[MQTTClient] = None) -> Dict[str, Any]:
-    """Read all sensors and return data dictionary"""
+# Serial client kept open across polling cycles
+_client: Optional[ModbusSerialClient] = None
+_client_params: Optional[tuple] = None
+
+def get_client(config) -> Optional[ModbusSerialClient]:
+    """Return a connected Modbus client, reopening it if serial settings changed"""
+    global _client, _client_params
     
-    # Load configuration
-    config = config_manager.config
-    port = config.serial_port
-    baudrate = config.baudrate
+    params = (config.serial_port, config.baudrate, config.stop_bits,
+              config.data_bits, config.parity)
+    if _client is not None and params != _client_params:
+        logger.info("Serial settings changed, reopening Modbus client")
+        _client.close()
+        _client = None
     
-    logger.info(f"Connecting to Modbus on {port} @ {baudrate} baud")
+    if _client is None:
+        logger.info(f"Connecting to Modbus on {config.serial_port} @ {config.baudrate} baud")
+        _client = ModbusSerialClient(
+            method="rtu",
+            port=config.serial_port,
+            baudrate=config.baudrate,
+            timeout=2,
+            stopbits=config.stop_bits,
+            bytesize=config.data_bits,
+            parity=config.parity
+        )
+        _client_params = params
     
-    # Create Modbus client
-    client = ModbusSerialClient(
-        method="rtu",
-        port=port,
-        baudrate=baudrate,
-        timeout=2,
-        stopbits=config.stop_bits,
-        bytesize=config.data_bits,
-        parity=config.parity
-    )
-    
-    if not client.connect():
+    if not _client.connect():
         logger.error("❌ Modbus connection failed!")
-        return {}
-    
-    result = {}
-    
-    # === LDR Sensor (Slave 1) ===
-    try:
-        r = read_sensor_safe(client, 0x0000, 2, 1, 'holding')
-        if r:
-            lux = (r.registers[0] << 16) | r.registers[1]
-            result["ldr_lux"] = lux
-            result["is_dark"] = lux < 20000
-            logger.debug(f"LDR: {lux} lux")
-    except Exception as e:
-        logger.error(f"LDR Exception: {e}")
-    
-    # === Environmental Sensor (Slave 123) ===
-    try:
-        co2 = read_sensor_safe(client, 0x0008, 2, 123, 'holding')
-        temp = read_sensor_safe(client, 0x000E, 2, 123, 'holding')
-        hum = read_sensor_safe(client, 0x0010, 2, 123, 'holding')
-        pm25 = read_sensor_safe(client, 0x000A, 2, 123, 'holding')
-        pm10 = read_sensor_safe(client, 0x000C, 2, 123, 'holding')
-        illumination = read_sensor_safe(client, 0x0012, 2, 123, 'holding')
-        
-        if all([co2, temp, hum, pm25, pm10, illumination]):
-            co2_val = read_float32_ieee754(co2.registers)
-            temp_val = read_float32_ieee754(temp.registers)
-            hum_val = read_float32_ieee754(hum.registers)
-            pm25_val = read_float32_ieee754(pm25.registers)
-            pm10_val = read_float32_ieee754(pm10.registers)
-            illum_val = read_float32_ieee754(illumination.registers)
-            
-            result["co2"] = round(co2_val, 2)
-            result["temperature"] = round(temp_val, 2)
-            result["humidity"] = round(hum_val, 2)
-            result["pm2_5"] = round(pm25_val, 2)
-            result["pm10"] = round(pm10_val, 2)
-            result["illumination"] = round(illum_val, 2)
-            
-            air_text, air_score = classify_air_quality(pm25_val, co2_val)
-            result["air_quality"] = air_text
-            result["air_quality_score"] = air_score
-            
-            lux = result.get("ldr_lux", 0)
-            result["weather_status"] = estimate_weather(temp_val, hum_val, lux)
-            
-            logger.debug(f"EnvSensor: T={temp_val}°C, H={hum_val}%, CO2={co2_val}ppm")
-        else:
-            logger.warning("EnvSensor: incomplete data")
-    except Exception as e:
-        logger.error(f"EnvSensor Exception: {e}")
-    
-    # === MPPT Charge Controller (Slave 3) ===
-    try:
-        pv_v = read_sensor_safe(client, 0x3000, 1, 3, 'input')
-        pv_c = read_sensor_safe(client, 0x3001, 1, 3, 'input')
-        
-        if pv_v and pv_c:
-            volt = pv_v.registers[0] / 100.0
-            curr = pv_c.registers[0] / 100.0
-            result["pv_voltage"] = round(volt, 2)
-            result["pv_current"] = round(curr, 2)
-            result["pv_power"] = round(volt * curr, 2)
-            result["mppt_status"] = "Charging" if curr > 0.1 else "Idle"
-            logger.debug(f"MPPT: {volt}V, {curr}A, {volt*curr}W")
-    except Exception as e:
-        logger.error(f"MPPT Exception: {e}")
-    
-    # === PIR Motion Sensor (Slave 2) ===
-    try:
-        pir = read_sensor_safe(client, 0x0006, 1, 2, 'holding')
-        if pir:
-            pir_value = pir.registers[0]
-            result["motion_detected"] = pir_value == 1
-            result["display_should_be_on"] = pir_value == 1
-            logger.debug(f"PIR: {'Motion' if pir_value == 1 else 'No motion'}")
-    except Exception as e:
-        logger.error(f"PIR Exception: {e}")
+        return None
+    return _client
+
+def _read_ldr(client, result: Dict[str, Any]):
+    """LDR Sensor (Slave 1)"""
+    r = read_sensor_safe(client, 0x0000, 2, 1, 'holding')
+    if r:
+        lux = (r.registers[0] << 16) | r.registers[1]
+        result["ldr_lux"] = lux
+        result["is_dark"] = lux < 20000
+        logger.debug(f"LDR: {lux} lux")
+
+def _read_env(client, result: Dict[str, Any]):
+    """Environmental Sensor (Slave 123)"""
+    # 0x0008-0x0013: CO2, PM2.5, PM10, temperature, humidity, illumination
+    # (one float32 per register pair), fetched in a single transaction
+    env = read_sensor_safe(client, 0x0008, 12, 123, 'holding')
     
-    # === BMS Battery Management (Slave 4) ===
-    try:
-        bv = read_sensor_safe(client, 0x3004, 1, 4, 'input')
-        bc = read_sensor_safe(client, 0x3005, 1, 4, 'input')
-        soc = read_sensor_safe(client, 0x3020, 1, 4, 'input')
-        soh = read_sensor_safe(client, 0x3021, 1, 4, 'input')
-        bt = read_sensor_safe(client, 0x3022, 1, 4, 'input')
-        dt = read_sensor_safe(client, 0x3023, 1, 4, 'input')
-        ct = read_sensor_safe(client, 0x3024, 1, 4, 'input')
-        
-        if bv and bc:
-            voltage = bv.registers[0] / 100.0
-            current = bc.registers[0] / 100.0
-            result["battery_voltage"] = round(voltage, 2)
-            result["battery_current"] = round(current, 2)
-            result["battery_power"] = round(voltage * current, 2)
+    # Validate the whole block once; the decoder itself does no checking
+    if env and len(env.registers) >= 12:
+        (co2_val, pm25_val, pm10_val,
+         temp_val, hum_val, illum_val) = decode_env_block(env.registers[:12])
         
-        if soc:
-            result["battery_soc"] = soc.registers[0]
-        if soh:
-            result["battery_soh"] = soh.registers[0]
-        if bt:
-            result["battery_temp"] = bt.registers[0] / 10.0
-        if dt:
-            result["discharge_time"] = dt.registers[0]
-        if ct:
-            result["charge_time"] = ct.registers[0]
+        result["co2"] = round(co2_val, 2)
+        result["temperature"] = round(temp_val, 2)
+        result["humidity"] = round(hum_val, 2)
+        result["pm2_5"] = round(pm25_val, 2)
+        result["pm10"] = round(pm10_val, 2)
+        result["illumination"] = round(illum_val, 2)
         
-        result["bms_low_power_mode"] = result.get("battery_soc", 100) < 30
+        air_text, air_score = classify_air_quality(pm25_val, co2_val)
+        result["air_quality"] = air_text
+        result["air_quality_score"] = air_score
         
-        logger.debug(f"BMS: {result.get('battery_voltage')}V, SOC={result.get('battery_soc')}%")
+        lux = result.get("ldr_lux", 0)
+        result["weather_status"] = estimate_weather(temp_val, hum_val, lux)
         
-    except Exception as e:
-        logger.error(f"BMS Exception: {e}")
+        logger.debug(f"EnvSensor: T={temp_val}°C, H={hum_val}%, CO2={co2_val}ppm")
+    elif env:
+        logger.warning(f"EnvSensor: short block ({len(env.registers)} of 12 registers)")
+    else:
+        logger.warning("EnvSensor: incomplete data")
+
+def _read_mppt(client, result: Dict[str, Any]):
+    """MPPT Charge Controller (Slave 3)"""
+    pv = read_sensor_safe(client, 0x3000, 2, 3, 'input')
     
-    client.close()
+    if pv:
+        # n / 100.0 already prints with at most two decimals; only derived
+        # values and float32 readings need rounding for display
+        volt = pv.registers[0] / 100.0
+        curr = pv.registers[1] / 100.0
+        result["pv_voltage"] = volt
+        result["pv_current"] = curr
+        result["pv_power"] = round(volt * curr, 2)
+        result["mppt_status"] = "Charging" if curr > 0.1 else "Idle"
+        logger.debug(f"MPPT: {volt}V, {curr}A, {volt*curr}W")
+
+def _read_pir(client, result: Dict[str, Any]):
+    """PIR Motion Sensor (Slave 2)"""
+    pir = read_sensor_safe(client, 0x0006, 1, 2, 'holding')
+    if pir:
+        pir_value = pir.registers[0]
+        result["motion_detected"] = pir_value == 1
+        result["display_should_be_on"] = pir_value == 1
+        logger.debug(f"PIR: {'Motion' if pir_value == 1 else 'No motion'}")
+
+def _read_bms(client, result: Dict[str, Any]):
+    """BMS Battery Management (Slave 4)"""
+    # Two contiguous blocks: 0x3004-0x3005 (voltage, current) and
+    # 0x3020-0x3024 (SOC, SOH, temperature, discharge/charge time)
+    power = read_sensor_safe(client, 0x3004, 2, 4, 'input')
+    status = read_sensor_safe(client, 0x3020, 5, 4, 'input')
+    
+    if power:
+        v_raw, c_raw = power.registers[:2]
+        voltage = v_raw / 100.0
+        current = c_raw / 100.0
+        result["battery_voltage"] = voltage
+        result["battery_current"] = current
+        result["battery_power"] = round(voltage * current, 2)
     
-    # Save to JSON file
+    if status:
+        soc, soh, bt, dt, ct = status.registers[:5]
+        result["battery_soc"] = soc
+        result["battery_soh"] = soh
+        result["battery_temp"] = bt / 10.0
+        result["discharge_time"] = dt
+        result["charge_time"] = ct
+    
+    result["bms_low_power_mode"] = result.get("battery_soc", 100) < 30
+    
+    logger.debug(f"BMS: {result.get('battery_voltage')}V, SOC={result.get('battery_soc')}%")
+
+# Per-slave readers in polling order (the env reader uses the LDR lux value),
+# each polled every N cycles. All slaves share one RTU bus, so they are read
+# one after another; slow-changing charge/battery values are polled less
+# often so a timing-out slave holds up the bus on fewer cycles.
+SENSOR_READERS = [
+    ("LDR", _read_ldr, 1),
+    ("EnvSensor", _read_env, 1),
+    ("MPPT", _read_mppt, 3),
+    ("PIR", _read_pir, 1),
+    ("BMS", _read_bms, 3),
+]
+
+# Polling cycle counter and the values each reader produced when last polled
+_cycle = 0
+_held: Dict[str, Dict[str, Any]] = {}
+
+# Cycles waiting for housekeeping; bounded so a stalled broker or disk
+# cannot pile up readings in memory
+_out_q: queue.Queue = queue.Queue(maxsize=4)
+_worker: Optional[threading.Thread] = None
+
+def process_readings(result: Dict[str, Any],
+                     alarm_system: Optional[AlarmSystem] = None,
+                     mqtt_client: Optional[MQTTClient] = None):
+    """Save, log, publish and act on one cycle of sensor data"""
+    
+    # Save to JSON file; readers only ever see a complete file
     try:
-        with open(SENSOR_FILE, "w") as f:
-            json.dump(result, f, indent=2)
+        tmp_file = SENSOR_FILE + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(orjson.dumps(result))
+        os.replace(tmp_file, SENSOR_FILE)
         logger.info(f"✅ Data saved to {SENSOR_FILE}")
     except Exception as e:
         logger.error(f"Failed to save sensor data: {e}")
@@ -271,16 +302,18 @@ def read_sensors(alarm_system: Optional[AlarmSystem] = None,
     if config_manager.get('enable_data_logging', True):
         sensor_logger.log(result)
     
-    # Check alarms
-    if alarm_system:
-        alarms = alarm_system.check_alarms(result)
-        if alarms and mqtt_client and mqtt_client.is_connected():
-            for alarm in alarms:
-                mqtt_client.publish_alarm(alarm.__dict__)
-    
-    # Publish to MQTT
-    if mqtt_client and mqtt_client.is_connected():
-        mqtt_client.publish_sensor_data(result)
+    # Check alarms and publish to MQTT
+    try:
+        if alarm_system:
+            alarms = alarm_system.check_alarms(result)
+            if alarms and mqtt_client:
+                mqtt_client.publish_alarms([alarm.to_dict() for alarm in alarms])
+        
+        # Published even while disconnected; paho queues QoS 1/2 messages
+        if mqtt_client:
+            mqtt_client.publish_sensor_data(result)
+    except Exception as e:
+        logger.error(f"Alarm/MQTT processing error: {e}")
     
     # Apply relay logic
     try:
@@ -288,10 +321,83 @@ def read_sensors(alarm_system: Optional[AlarmSystem] = None,
         logger.debug("Relay control applied")
     except Exception as e:
         logger.error(f"Relay control error: {e}")
+
+def _housekeeping_worker(q: queue.Queue):
+    """Process queued readings in order, off the polling thread"""
+    while True:
+        result, alarm_system, mqtt_client = q.get()
+        try:
+            process_readings(result, alarm_system, mqtt_client)
+        except Exception as e:
+            logger.error(f"Housekeeping error: {e}")
+        finally:
+            q.task_done()
+
+def _enqueue_readings(result: Dict[str, Any],
+                      alarm_system: Optional[AlarmSystem],
+                      mqtt_client: Optional[MQTTClient]):
+    """Hand one cycle to the housekeeping worker, dropping it if the queue is full"""
+    global _worker
+    
+    if _worker is None:
+        _worker = threading.Thread(target=_housekeeping_worker, args=(_out_q,),
+                                   name="housekeeping", daemon=True)
+        _worker.start()
+    
+    try:
+        _out_q.put_nowait((result, alarm_system, mqtt_client))
+    except queue.Full:
+        logger.warning("Housekeeping queue full, dropping this reading cycle")
+
+def read_sensors(alarm_system: Optional[AlarmSystem] = None,
+                mqtt_client: Optional[MQTTClient] = None) -> Dict[str, Any]:
+    """Read all sensors and return data dictionary
+    
+    Saving, alarm checks, MQTT publishing and relay logic run on a
+    background worker so they overlap with the wait for the next cycle.
+    """
+    
+    # Pick up settings saved by the web UI since the last cycle
+    config_manager.reload_if_changed()
+    
+    client = get_client(config_manager.config)
+    if client is None:
+        return {}
+    
+    global _cycle
+    result = {}
+    
+    for name, reader, every in SENSOR_READERS:
+        if _cycle % every:
+            # Not due this cycle: repeat its last values
+            result.update(_held.get(name, {}))
+            continue
+        # Readers only add their own keys, so the new ones are at the end
+        start = len(result)
+        try:
+            reader(client, result)
+        except Exception as e:
+            logger.error(f"{name} Exception: {e}")
+        _held[name] = dict(islice(result.items(), start, None))
+    _cycle += 1
+    
+    _enqueue_readings(result, alarm_system, mqtt_client)
     
     return result
 
-if __name__ == "__main__":
+def _poll_interval() -> float:
+    """Configured polling interval in seconds (10 if the setting is not a positive number)"""
+    try:
+        interval = float(config_manager.get('interval', 10))
+        if interval > 0:
+            return interval
+    except (TypeError, ValueError):
+        pass
+    logger.warning(f"Invalid interval setting {config_manager.get('interval')!r}, using 10 s")
+    return 10.0
+
+def run(once: bool = False):
+    """Poll the sensors every configured interval (a single cycle if once)"""
     # Initialize alarm system
     alarm_sys = AlarmSystem(config_manager)
     
@@ -303,15 +409,38 @@ if __name__ == "__main__":
     logger.info("🚀 Modbus Reader başlatıldı")
     
     try:
-        interval = config_manager.get('interval', 10)
+        # Fixed deadlines keep the period at interval, not interval + read time
+        next_tick = time.monotonic()
         while True:
-            read_sensors(alarm_system=alarm_sys, mqtt_client=mqtt)
-            time.sleep(interval)
+            try:
+                read_sensors(alarm_system=alarm_sys, mqtt_client=mqtt)
+            except Exception as e:
+                # A bad cycle must not end polling; only Ctrl+C does
+                logger.error(f"Polling cycle error: {e}")
+            if once:
+                # Let housekeeping finish before the process exits
+                _out_q.join()
+                break
+            next_tick += _poll_interval()
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
     except KeyboardInterrupt:
         logger.info("Reader stopped by user")
-        if mqtt:
-            mqtt.disconnect()
-    except Exception as e:
-        logger.error(f"Fatal error: {e}")
-        if mqtt:
-            mqtt.disconnect()
\ No newline at end of file
+    finally:
+        if _client:
+            _client.close()
+        mqtt.disconnect()
+
+def main():
+    """Command-line entrypoint: set up logging, then poll until interrupted"""
+    setup_logging(
+        log_level=config_manager.get('log_level', 'INFO'),
+        log_file=config_manager.get('log_file', 'nugateway.log')
+    )
+    run()
+
+if __name__ == "__main__":
+    main()
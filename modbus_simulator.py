@@ -1,9 +1,10 @@
 import asyncio
 import random
+import time
 import struct
 import logging
 from pymodbus.datastore import ModbusServerContext, ModbusSlaveContext
-from pymodbus.datastore.store import ModbusSequentialDataBlock
+from pymodbus.datastore.store import ModbusSequentialDataBlock, ModbusSparseDataBlock
 from pymodbus.device import ModbusDeviceIdentification
 from pymodbus.server.async_io import StartAsyncSerialServer
 
@@ -11,36 +12,34 @@ from pymodbus.server.async_io import StartAsyncSerialServer
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def float_to_regs(value):
-    """Convert float to two 16-bit registers (IEEE 754)"""
-    return struct.unpack('>HH', struct.pack('>f', value))
+# Environmental sensor value ranges, in register order:
+# 0x0008 (8-9): CO2
+# 0x000A (10-11): PM2.5
+# 0x000C (12-13): PM10
+# 0x000E (14-15): Temperature
+# 0x0010 (16-17): Humidity
+# 0x0012 (18-19): Illumination
+ENV_RANGES = (
+    (400.0, 1500.0),
+    (5.0, 80.0),
+    (10.0, 150.0),
+    (5.0, 35.0),
+    (30.0, 90.0),
+    (1000, 50000),
+)
+
+# Six floats -> twelve big-endian 16-bit registers in one pack/unpack
+_pack_env = struct.Struct('>6f').pack
+_unpack_env_regs = struct.Struct('>12H').unpack
+
+# (low, span) per value, so a draw is one C-level random() plus a multiply-add
+_ENV_SPANS = tuple((lo, hi - lo) for lo, hi in ENV_RANGES)
+_random = random.random
 
 def generate_env_data():
     """Generate environmental sensor data for slave 123"""
-    co2 = float_to_regs(random.uniform(400.0, 1500.0))
-    temp = float_to_regs(random.uniform(5.0, 35.0))
-    hum = float_to_regs(random.uniform(30.0, 90.0))
-    pm25 = float_to_regs(random.uniform(5.0, 80.0))
-    pm10 = float_to_regs(random.uniform(10.0, 150.0))
-    lux = float_to_regs(random.uniform(1000, 50000))
-    
-    # Address mapping for environmental sensor:
-    # 0x0008 (8-9): CO2
-    # 0x000A (10-11): PM2.5
-    # 0x000C (12-13): PM10
-    # 0x000E (14-15): Temperature
-    # 0x0010 (16-17): Humidity
-    # 0x0012 (18-19): Illumination
-    
-    data = [0] * 20  # Initialize with zeros
-    data[8:10] = co2
-    data[10:12] = pm25
-    data[12:14] = pm10
-    data[14:16] = temp
-    data[16:18] = hum
-    data[18:20] = lux
-    
-    return data
+    values = [lo + span * _random() for lo, span in _ENV_SPANS]
+    return [0] * 8 + list(_unpack_env_regs(_pack_env(*values)))
 
 def generate_ldr_data():
     """Generate LDR sensor data for slave 1"""
@@ -64,13 +63,11 @@ def generate_mppt_data():
     voltage = int(random.uniform(15.0, 20.0) * 100)  # 1500-2000 (15.00-20.00V)
     current = int(random.uniform(2.0, 8.0) * 100)     # 200-800 (2.00-8.00A)
     
-    # Create data starting from address 0
-    # We need to fill up to 0x3001
-    data = [0] * 0x3002
-    data[0x3000] = voltage
-    data[0x3001] = current
-    
-    return data
+    # Only the used registers are stored (sparse data block)
+    return {
+        0x3000: voltage,
+        0x3001: current
+    }
 
 def generate_bms_data():
     """Generate BMS (Battery Management System) data for slave 4"""
@@ -91,34 +88,67 @@ def generate_bms_data():
     discharge = random.randint(30, 180)                # 30-180 min
     charge = random.randint(15, 120)                   # 15-120 min
     
-    # Create data array up to 0x3024
-    data = [0] * 0x3025
-    data[0x3004] = voltage
-    data[0x3005] = current
-    data[0x3020] = soc
-    data[0x3021] = soh
-    data[0x3022] = temp
-    data[0x3023] = discharge
-    data[0x3024] = charge
+    # Only the used registers are stored (sparse data block)
+    return {
+        0x3004: voltage,
+        0x3005: current,
+        0x3020: soc,
+        0x3021: soh,
+        0x3022: temp,
+        0x3023: discharge,
+        0x3024: charge
+    }
+
+class LazySlaveContext(ModbusSlaveContext):
+    """Slave context that regenerates its data on read instead of on a timer"""
+    
+    REGEN_INTERVAL = 1.0  # seconds; reads within this window share the same data
     
-    return data
+    def __init__(self, fc: int, generate, **kwargs):
+        super().__init__(**kwargs)
+        self.fc = fc
+        self.generate = generate
+        self.last_regen = time.monotonic()
+    
+    def getValues(self, fc_as_hex, address, count=1):
+        now = time.monotonic()
+        if now - self.last_regen > self.REGEN_INTERVAL:
+            try:
+                # MPPT and BMS generators return {address: value} dicts; sparse
+                # blocks take their keys as-is, so the address 0 is ignored
+                self.setValues(self.fc, 0, self.generate())
+            except Exception as e:
+                logger.error(f"Error updating sensor data: {e}")
+            self.last_regen = now
+        return super().getValues(fc_as_hex, address, count)
 
-# Initialize data stores for each slave
+# Initialize data stores for each slave. zero_mode=True so request addresses
+# map 1:1 onto block addresses (the default would add 1 to each).
 store = {
-    1: ModbusSlaveContext(
-        hr=ModbusSequentialDataBlock(0, generate_ldr_data())
+    1: LazySlaveContext(
+        3, generate_ldr_data,
+        hr=ModbusSequentialDataBlock(0, generate_ldr_data()),
+        zero_mode=True
     ),
-    2: ModbusSlaveContext(
-        hr=ModbusSequentialDataBlock(0, generate_pir_data())
+    2: LazySlaveContext(
+        3, generate_pir_data,
+        hr=ModbusSequentialDataBlock(0, generate_pir_data()),
+        zero_mode=True
     ),
-    3: ModbusSlaveContext(
-        ir=ModbusSequentialDataBlock(0, generate_mppt_data())
+    3: LazySlaveContext(
+        4, generate_mppt_data,
+        ir=ModbusSparseDataBlock(generate_mppt_data()),
+        zero_mode=True
     ),
-    4: ModbusSlaveContext(
-        ir=ModbusSequentialDataBlock(0, generate_bms_data())
+    4: LazySlaveContext(
+        4, generate_bms_data,
+        ir=ModbusSparseDataBlock(generate_bms_data()),
+        zero_mode=True
     ),
-    123: ModbusSlaveContext(
-        hr=ModbusSequentialDataBlock(0, generate_env_data())
+    123: LazySlaveContext(
+        3, generate_env_data,
+        hr=ModbusSequentialDataBlock(0, generate_env_data()),
+        zero_mode=True
     )
 }
 
@@ -133,28 +163,10 @@ identity.ProductName = "Modbus Sensor Simulator"
 identity.ModelName = "Sim01"
 identity.MajorMinorRevision = "2.0"
 
-async def update_loop():
-    """Continuously update sensor data every 5 seconds"""
-    while True:
-        try:
-            store[1].setValues(3, 0, generate_ldr_data())
-            store[2].setValues(3, 0, generate_pir_data())
-            store[3].setValues(4, 0, generate_mppt_data())
-            store[4].setValues(4, 0, generate_bms_data())
-            store[123].setValues(3, 0, generate_env_data())
-            logger.debug("Sensor data updated")
-        except Exception as e:
-            logger.error(f"Error updating sensor data: {e}")
-        
-        await asyncio.sleep(5)
-
 async def run():
     """Start the Modbus RTU simulator server"""
     logger.info("🚀 Modbus RTU Simulator başlatılıyor (/tmp/ttySIM0)...")
     
-    # Start data update loop
-    asyncio.create_task(update_loop())
-    
     # Start Modbus server
     await StartAsyncSerialServer(
         context=context,
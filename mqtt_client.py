@@ -1,8 +1,9 @@
 import logging
-import json
-from typing import Dict, Any, Optional
+import socket
+import orjson
+from typing import Dict, Any, List, Optional
 import paho.mqtt.client as mqtt
-from threading import Thread
+from threading import Thread, Timer, Lock
 
 class MQTTClient:
     """MQTT client for IoT integration"""
@@ -11,6 +12,23 @@ class MQTTClient:
         self.config = config
         self.client: Optional[mqtt.Client] = None
         self.connected = False
+        self.control_callback = None
+        self._offline_logged = False  # one offline warning per disconnect
+        self.qos = int(config.get('mqtt_sensor_qos', 0))
+        
+        # Topic names, built once
+        base = config.get('mqtt_topic', 'nugateway/sensors')
+        self._topic = base
+        self._batch_topic = f"{base}/batch"
+        self._alarm_topic = f"{base}/alarms"
+        self._alarm_batch_topic = f"{base}/alarms/batch"
+        self._control_topic = f"{base}/control"
+        
+        # Sensor readings waiting for the next batch flush
+        self.batch_interval = float(config.get('mqtt_batch_interval', 0))
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_lock = Lock()
+        self._flush_timer: Optional[Timer] = None
         
         if config.get('mqtt_enabled', False):
             self._initialize()
@@ -18,13 +36,24 @@ class MQTTClient:
     def _initialize(self):
         """Initialize MQTT client"""
         try:
-            self.client = mqtt.Client(client_id=f"nugateway_{self.config.get('gateway_name', 'default')}")
+            # Persistent session: the broker keeps our subscriptions and
+            # QoS 1/2 messages across reconnects
+            self.client = mqtt.Client(
+                client_id=f"nugateway_{self.config.get('gateway_name', 'default')}",
+                clean_session=False
+            )
             
             # Set callbacks
             self.client.on_connect = self._on_connect
             self.client.on_disconnect = self._on_disconnect
             self.client.on_message = self._on_message
             
+            # Pipeline QoS 1/2 publishes and buffer them while offline;
+            # loop_start's thread reconnects with this backoff
+            self.client.max_inflight_messages_set(20)
+            self.client.max_queued_messages_set(2000)
+            self.client.reconnect_delay_set(min_delay=1, max_delay=32)
+            
             # Set credentials if provided
             username = self.config.get('mqtt_username', '')
             password = self.config.get('mqtt_password', '')
@@ -60,44 +89,102 @@ class MQTTClient:
     def disconnect(self):
         """Disconnect from MQTT broker"""
         if self.client:
+            self._flush()
             self.client.loop_stop()
             self.client.disconnect()
             self.connected = False
             logging.info("MQTT disconnected")
     
+    def _publish(self, topic: str, payload: bytes, qos: int) -> bool:
+        """Publish a payload; True if it was sent or queued for delivery"""
+        result = self.client.publish(topic, payload, qos=qos)
+        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            logging.debug(f"Published to {topic}")
+            return True
+        
+        if result.rc == mqtt.MQTT_ERR_NO_CONN:
+            # Offline: paho keeps QoS 1/2 messages for the reconnect,
+            # QoS 0 messages are dropped
+            if not self._offline_logged:
+                logging.warning("MQTT offline; queueing QoS 1/2 messages until reconnect")
+                self._offline_logged = True
+            return qos > 0
+        
+        logging.warning(f"Publish to {topic} failed with code {result.rc}")
+        return False
+    
     def publish_sensor_data(self, data: Dict[str, Any]) -> bool:
-        """Publish sensor data to MQTT topic"""
-        if not self.connected or not self.client:
+        """Publish sensor data to MQTT topic (or queue it for the next batch)"""
+        # Publish even while disconnected; paho queues QoS 1/2 until reconnect
+        if not self.client:
             return False
         
+        if self.batch_interval > 0:
+            with self._pending_lock:
+                self._pending.append(data)
+                if self._flush_timer is None:
+                    self._flush_timer = Timer(self.batch_interval, self._flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+            return True
+        
         try:
-            topic = self.config.get('mqtt_topic', 'nugateway/sensors')
-            payload = json.dumps(data)
-            
-            result = self.client.publish(topic, payload, qos=1)
+            topic = self._topic
+            payload = orjson.dumps(data)
             
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logging.debug(f"Published to {topic}")
-                return True
-            else:
-                logging.warning(f"Publish failed with code {result.rc}")
-                return False
+            return self._publish(topic, payload, self.qos)
                 
         except Exception as e:
             logging.error(f"MQTT publish error: {e}")
             return False
     
+    def _flush(self) -> bool:
+        """Publish all pending sensor readings as one JSON array"""
+        with self._pending_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending, self._pending = self._pending, []
+        
+        if not pending or not self.client:
+            return False
+        
+        try:
+            topic = self._batch_topic
+            payload = orjson.dumps(pending)
+            
+            return self._publish(topic, payload, self.qos)
+            
+        except Exception as e:
+            logging.error(f"MQTT batch publish error: {e}")
+            return False
+    
     def publish_alarm(self, alarm: Dict[str, Any]) -> bool:
         """Publish alarm to MQTT"""
-        if not self.connected or not self.client:
+        if not self.client:
+            return False
+        
+        try:
+            topic = self._alarm_topic
+            payload = orjson.dumps(alarm)
+            
+            return self._publish(topic, payload, 2)  # QoS 2 for alarms
+            
+        except Exception as e:
+            logging.error(f"MQTT alarm publish error: {e}")
+            return False
+    
+    def publish_alarms(self, alarms: List[Dict[str, Any]]) -> bool:
+        """Publish a batch of alarms as one JSON array"""
+        if not self.client:
             return False
         
         try:
-            topic = f"{self.config.get('mqtt_topic', 'nugateway/sensors')}/alarms"
-            payload = json.dumps(alarm)
+            topic = self._alarm_batch_topic
+            payload = orjson.dumps(alarms)
             
-            result = self.client.publish(topic, payload, qos=2)  # QoS 2 for alarms
-            return result.rc == mqtt.MQTT_ERR_SUCCESS
+            return self._publish(topic, payload, 2)  # QoS 2 for alarms
             
         except Exception as e:
             logging.error(f"MQTT alarm publish error: {e}")
@@ -109,7 +196,7 @@ class MQTTClient:
             return False
         
         try:
-            control_topic = f"{self.config.get('mqtt_topic', 'nugateway/sensors')}/control"
+            control_topic = self._control_topic
             self.client.subscribe(control_topic, qos=1)
             self.control_callback = callback
             logging.info(f"Subscribed to {control_topic}")
@@ -123,6 +210,12 @@ class MQTTClient:
         """Callback for connection"""
         if rc == 0:
             self.connected = True
+            self._offline_logged = False
+            try:
+                # Small telemetry packets should go out immediately
+                client.socket().setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except (AttributeError, OSError) as e:
+                logging.debug(f"Could not set TCP_NODELAY: {e}")
             logging.info("MQTT connected successfully")
         else:
             self.connected = False
@@ -137,10 +230,10 @@ class MQTTClient:
     def _on_message(self, client, userdata, msg):
         """Callback for incoming messages"""
         try:
-            payload = json.loads(msg.payload.decode())
+            payload = orjson.loads(msg.payload)
             logging.info(f"MQTT message received: {msg.topic}")
             
-            if hasattr(self, 'control_callback'):
+            if self.control_callback is not None:
                 self.control_callback(msg.topic, payload)
                 
         except Exception as e:
@@ -1,5 +1,6 @@
 import logging
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +57,9 @@ class RelayController:
     def __init__(self):
         self.relays = {}
         self.state = {}
+        # Read-only live view of state, and a cached copy for serializing
+        self._state_view = MappingProxyType(self.state)
+        self._snapshot: Optional[Dict[str, bool]] = None
         self._initialize_relays()
     
     def _initialize_relays(self):
@@ -78,9 +82,14 @@ class RelayController:
             logger.warning(f"Unknown relay: {name}")
             return False
         
+        # Skip the GPIO write when the relay is already in the requested state
+        if self.state.get(name) == state:
+            return True
+        
         try:
             self.relays[name].value = state
             self.state[name] = state
+            self._snapshot = None
             logger.debug(f"Relay '{name}': {'ON' if state else 'OFF'}")
             return True
         except Exception as e:
@@ -91,9 +100,15 @@ class RelayController:
         """Get relay state"""
         return self.state.get(name, False)
     
-    def get_all_states(self) -> Dict[str, bool]:
-        """Get all relay states"""
-        return self.state.copy()
+    def get_all_states(self) -> Mapping[str, bool]:
+        """Get all relay states (read-only live view)"""
+        return self._state_view
+    
+    def snapshot(self) -> Dict[str, bool]:
+        """Get all relay states as a plain dict (cached until a relay changes)"""
+        if self._snapshot is None:
+            self._snapshot = dict(self.state)
+        return self._snapshot
     
     def toggle_relay(self, name: str) -> bool:
         """Toggle relay state"""
@@ -152,7 +167,7 @@ def apply_logic(data: Dict[str, Any]):
 
 def get_relay_states() -> Dict[str, bool]:
     """Get current state of all relays"""
-    return relay_controller.get_all_states()
+    return relay_controller.snapshot()
 
 def manual_control(name: str, state: bool) -> bool:
     """Manual relay control (overrides automation)"""
@@ -181,5 +196,5 @@ if __name__ == "__main__":
         relay_controller.set_relay(name, False)
         time.sleep(0.5)
     
-    print("\nRelay states:", relay_controller.get_all_states())
+    print("\nRelay states:", relay_controller.snapshot())
     cleanup()
\ No newline at end of file